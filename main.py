@@ -1,5 +1,3 @@
-
-
 """
 To-Do MCP Server for mcp-agent Cloud
 -------------------------------------
@@ -19,28 +17,39 @@ Tools:
 from __future__ import annotations
 
 import asyncio
+import atexit
 import json
 import os
+import threading
 from pathlib import Path
-import uuid
 import uvicorn
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
+from starlette.middleware.gzip import GZipMiddleware
 from starlette.routing import Mount
 from starlette.staticfiles import StaticFiles
 import mcp.types as types
 from mcp.server.fastmcp import FastMCP
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from mcp_agent.app import MCPApp
 from mcp_agent.server.app_server import create_mcp_server_for_app
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - wheel may be unavailable on some targets
+    orjson = None
+
 # ------------------------------
 # Configuration
 # ------------------------------
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 DATA_FILE = os.path.join(DATA_DIR, "tasks.json")
 
+# tasks.json is machine-consumed, so it is written compact by default; set
+# TODO_DEBUG_JSON=1 to pretty-print it for manual inspection.
+PRETTY_STORE = os.getenv("TODO_DEBUG_JSON") == "1"
+
 os.makedirs(DATA_DIR, exist_ok=True)
 if not os.path.exists(DATA_FILE):
     with open(DATA_FILE, "w", encoding="utf-8") as f:
@@ -50,6 +59,8 @@ if not os.path.exists(DATA_FILE):
 # Models
 # ------------------------------
 class Task(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     id: str
     text: str
     done: bool = False
@@ -57,19 +68,86 @@ class Task(BaseModel):
     due_date: Optional[str] = None
 
 class TaskList(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     tasks: List[Task]
 
+# Build the pydantic-core validators/serializers eagerly so the first request
+# doesn't pay the schema-compile cost.
+Task.model_rebuild()
+TaskList.model_rebuild()
+
 # ------------------------------
 # Storage helpers
 # ------------------------------
+_store_lock = threading.Lock()
+
 def _read_store() -> TaskList:
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        raw = json.load(f)
-    return TaskList(tasks=[Task(**t) for t in raw.get("tasks", [])])
+    if orjson is not None:
+        raw = orjson.loads(Path(DATA_FILE).read_bytes())
+    else:
+        with open(DATA_FILE, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    # The store only ever contains data this process wrote itself, so skip
+    # re-validating it: model_construct bypasses pydantic-core entirely.
+    # Client-supplied input (add_task) still goes through full validation.
+    return TaskList.model_construct(
+        tasks=[Task.model_construct(**t) for t in raw.get("tasks", [])]
+    )
 
 def _write_store(tasks: TaskList) -> None:
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump({"tasks": [t.model_dump() for t in tasks.tasks]}, f, indent=2)
+    # exclude_none drops "due_date": null entries; model_construct on reload
+    # restores the field default for tasks saved without one.
+    payload = tasks.model_dump(mode="json", exclude_none=True)
+    tmp_file = DATA_FILE + ".tmp"
+    if orjson is not None:
+        raw = orjson.dumps(payload, option=orjson.OPT_INDENT_2 if PRETTY_STORE else 0)
+    elif PRETTY_STORE:
+        raw = json.dumps(payload, indent=2).encode("utf-8")
+    else:
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    Path(tmp_file).write_bytes(raw)
+    os.replace(tmp_file, DATA_FILE)
+
+# In-memory store, loaded once at startup. Tool handlers mutate this instance
+# under _store_lock and persist through _write_store; disk is never re-read
+# during the lifetime of the process. _INDEX maps task id -> Task so lookups
+# don't scan the list; it is kept in sync with _STORE.tasks under _store_lock.
+_STORE = _read_store()
+_INDEX: Dict[str, Task] = {t.id: t for t in _STORE.tasks}
+
+# Writes are debounced: mutations mark the store dirty and schedule a flush
+# shortly after, so a burst of add_task/mark_done calls costs one disk write
+# instead of one per call. atexit flushes anything still pending at shutdown.
+_FLUSH_DELAY_SECONDS = 0.05
+_dirty = False
+_flush_handle: Optional[asyncio.TimerHandle] = None
+
+def _flush() -> None:
+    global _dirty, _flush_handle
+    _flush_handle = None
+    if not _dirty:
+        return
+    with _store_lock:
+        _write_store(_STORE)
+        # Cleared only after the write succeeds: if it raises, the store stays
+        # dirty so the next mutation (or the exit hook) retries the flush.
+        _dirty = False
+
+def _schedule_flush() -> None:
+    global _dirty, _flush_handle
+    _dirty = True
+    if _flush_handle is None:
+        _flush_handle = asyncio.get_running_loop().call_later(_FLUSH_DELAY_SECONDS, _flush)
+
+def _flush_on_exit() -> None:
+    global _dirty
+    with _store_lock:
+        if _dirty:
+            _write_store(_STORE)
+            _dirty = False
+
+atexit.register(_flush_on_exit)
 
 # ------------------------------
 # FastMCP Server
@@ -104,7 +182,10 @@ BASE_WIDGET_META = {
     "openai/toolInvocation/invoked": TOOL_INVOKED_TEXT,
 }
 
-# Widget HTML
+# Widget HTML. The task list is no longer embedded here: the JS bundle reads
+# it from the host (window.openai.toolOutput), which carries the same data the
+# server already returns in structuredContent. That makes the widget HTML a
+# process constant rendered once at import.
 INLINE_HTML_TEMPLATE = """
 <div id="todo-root"></div>
 <style>
@@ -113,18 +194,28 @@ INLINE_HTML_TEMPLATE = """
 <script type="module">
 {TODO_JS}
 </script>
-<script id="todo-data" type="application/json">{TASKS_JSON}</script>
 """
 
-def _render_widget_html(tasks_data: Dict[str, Any]) -> str:
-    """Render widget HTML that defers UI rendering to the hosted bundle."""
-   
-    tasks_json = json.dumps(tasks_data).replace("</", "<\\/")
+# When WIDGET_ASSET_BASE_URL points at the public /static mount, the widget
+# ships a small shell referencing the versioned bundles instead of inlining
+# them, shrinking every embedded resource by the size of the CSS+JS.
+LINKED_HTML_TEMPLATE = """
+<div id="todo-root"></div>
+<link rel="stylesheet" href="{CSS_URL}">
+<script type="module" src="{JS_URL}"></script>
+"""
+
+WIDGET_ASSET_BASE_URL = os.getenv("WIDGET_ASSET_BASE_URL", "").rstrip("/")
 
-    return INLINE_HTML_TEMPLATE.format(
+if WIDGET_ASSET_BASE_URL:
+    _WIDGET_HTML = LINKED_HTML_TEMPLATE.format(
+        CSS_URL=f"{WIDGET_ASSET_BASE_URL}/todo.css?v={WIDGET_ASSET_VERSION}",
+        JS_URL=f"{WIDGET_ASSET_BASE_URL}/todo.js?v={WIDGET_ASSET_VERSION}",
+    )
+else:
+    _WIDGET_HTML = INLINE_HTML_TEMPLATE.format(
         TODO_CSS=TODO_CSS,
         TODO_JS=TODO_JS,
-        TASKS_JSON=tasks_json,
     )
 
 def _tool_meta() -> Dict[str, Any]:
@@ -137,99 +228,113 @@ def _tool_meta() -> Dict[str, Any]:
         },
     }
 
-def _embedded_widget_resource(tasks_data: Dict[str, Any]) -> types.EmbeddedResource:
+_TOOL_META = _tool_meta()
+
+def _embedded_widget_resource() -> types.EmbeddedResource:
     return types.EmbeddedResource(
         type="resource",
         resource=types.TextResourceContents(
             uri=TEMPLATE_URI,
             mimeType=MIME_TYPE,
-            text=_render_widget_html(tasks_data),
+            text=_WIDGET_HTML,
             title="Todo List",
         ),
     )
 
-# Tool definitions
-@mcp._mcp_server.list_tools()
-async def _list_tools() -> List[types.Tool]:
-    return [
-        types.Tool(
-            name="get_tasks",
-            title="Get Tasks",
-            description="Fetches the current list of to-do items",
-            inputSchema={"type": "object", "properties": {}, "additionalProperties": False},
-            _meta=_tool_meta(),
-        ),
-        types.Tool(
-            name="add_task",
-            title="Add Task",
-            description="Adds a new to-do task and returns the updated list",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "text": {"type": "string", "description": "The task description"},
-                    "due_date": {"type": "string", "description": "Optional due date in ISO 8601 format"},
-                },
-                "required": ["text"],
-                "additionalProperties": False,
+# With no task data in the HTML the widget _meta block is fully static; dump
+# the EmbeddedResource once at import.
+_WIDGET_META: Dict[str, Any] = {
+    "openai.com/widget": _embedded_widget_resource().model_dump(mode="json", exclude_none=True),
+    **BASE_WIDGET_META,
+}
+
+# Tool definitions. The discovery lists are static, so the pydantic model
+# instances are built once at import and the handlers return the same lists.
+_TOOLS_CACHED: List[types.Tool] = [
+    types.Tool(
+        name="get_tasks",
+        title="Get Tasks",
+        description="Fetches the current list of to-do items",
+        inputSchema={"type": "object", "properties": {}, "additionalProperties": False},
+        _meta=_TOOL_META,
+    ),
+    types.Tool(
+        name="add_task",
+        title="Add Task",
+        description="Adds a new to-do task and returns the updated list",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "text": {"type": "string", "description": "The task description"},
+                "due_date": {"type": "string", "description": "Optional due date in ISO 8601 format"},
             },
-            _meta=_tool_meta(),
-        ),
-        types.Tool(
-            name="mark_done",
-            title="Mark Task Done",
-            description="Marks a task as done or undone by its ID",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {"type": "string", "description": "The unique ID of the task"},
-                    "done": {"type": "boolean", "description": "Whether to mark as done (true) or undone (false)"},
-                },
-                "required": ["task_id"],
-                "additionalProperties": False,
+            "required": ["text"],
+            "additionalProperties": False,
+        },
+        _meta=_TOOL_META,
+    ),
+    types.Tool(
+        name="mark_done",
+        title="Mark Task Done",
+        description="Marks a task as done or undone by its ID",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {"type": "string", "description": "The unique ID of the task"},
+                "done": {"type": "boolean", "description": "Whether to mark as done (true) or undone (false)"},
             },
-            _meta=_tool_meta(),
-        ),
-    ]
+            "required": ["task_id"],
+            "additionalProperties": False,
+        },
+        _meta=_TOOL_META,
+    ),
+]
+
+@mcp._mcp_server.list_tools()
+async def _list_tools() -> List[types.Tool]:
+    return _TOOLS_CACHED
 
 # Resources for widget HTML
+_RESOURCES_CACHED: List[types.Resource] = [
+    types.Resource(
+        name="Todo List Widget",
+        title="Todo List Widget",
+        uri=TEMPLATE_URI,
+        description="Interactive todo list display",
+        mimeType=MIME_TYPE,
+        _meta=_TOOL_META,
+    ),
+]
+
+_TEMPLATES_CACHED: List[types.ResourceTemplate] = [
+    types.ResourceTemplate(
+        name="Todo List Widget",
+        title="Todo List Widget",
+        uriTemplate=TEMPLATE_URI,
+        description="Interactive todo list display",
+        mimeType=MIME_TYPE,
+        _meta=_TOOL_META,
+    ),
+]
+
 @mcp._mcp_server.list_resources()
 async def _list_resources() -> List[types.Resource]:
-    return [
-        types.Resource(
-            name="Todo List Widget",
-            title="Todo List Widget",
-            uri=TEMPLATE_URI,
-            description="Interactive todo list display",
-            mimeType=MIME_TYPE,
-            _meta=_tool_meta(),
-        ),
-    ]
+    return _RESOURCES_CACHED
 
 @mcp._mcp_server.list_resource_templates()
 async def _list_resource_templates() -> List[types.ResourceTemplate]:
-    return [
-        types.ResourceTemplate(
-            name="Todo List Widget",
-            title="Todo List Widget",
-            uriTemplate=TEMPLATE_URI,
-            description="Interactive todo list display",
-            mimeType=MIME_TYPE,
-            _meta=_tool_meta(),
-        ),
-    ]
+    return _TEMPLATES_CACHED
 
 async def _handle_read_resource(req: types.ReadResourceRequest) -> types.ServerResult:
     if str(req.params.uri) == TEMPLATE_URI:
-        tasks = _read_store()
-        tasks_data = {"tasks": [t.model_dump() for t in tasks.tasks]}
         return types.ServerResult(
             types.ReadResourceResult(
                 contents=[
                     types.TextResourceContents(
                         uri=TEMPLATE_URI,
                         mimeType=MIME_TYPE,
-                        text=_render_widget_html(tasks_data),
-                        _meta=_tool_meta(),
+                        text=_WIDGET_HTML,
+                        _meta=_TOOL_META,
                     )
                 ]
             )
@@ -243,128 +348,84 @@ async def _handle_read_resource(req: types.ReadResourceRequest) -> types.ServerR
 
 mcp._mcp_server.request_handlers[types.ReadResourceRequest] = _handle_read_resource
 
-async def _handle_call_tool(req: types.CallToolRequest) -> types.ServerResult:
-    tool_name = req.params.name
-    args = req.params.arguments or {}
-
-    # Meta is populated per-response after we know the current task state.
-    def _meta_with_widget(tasks_data: Dict[str, Any]) -> Dict[str, Any]:
-        widget_resource = _embedded_widget_resource(tasks_data)
-        return {
-            "openai.com/widget": widget_resource.model_dump(mode="json"),
-            **BASE_WIDGET_META,
-        }
-
-    try:
-        if tool_name == "get_tasks":
-            tasks = _read_store()
-            tasks_data = {"tasks": [t.model_dump() for t in tasks.tasks]}
-            meta = _meta_with_widget(tasks_data)
-
-            return types.ServerResult(
-                types.CallToolResult(
-                    content=[
-                        types.TextContent(
-                            type="text",
-                            text="Here are your tasks!",
-                        )
-                    ],
-                    structuredContent=tasks_data,
-                    _meta=meta,
-                )
-            )
-
-        elif tool_name == "add_task":
-            text = args.get("text", "").strip()
-            if not text:
-                return types.ServerResult(
-                    types.CallToolResult(
-                        content=[types.TextContent(type="text", text="Error: Task text cannot be empty")],
-                        isError=True,
-                    )
-                )
-
-            tasks = _read_store()
-            new_task = Task(
-                id=str(uuid.uuid4()),
-                text=text,
-                done=False,
-                created_at=datetime.utcnow().isoformat() + "Z",
-                due_date=args.get("due_date"),
-            )
-            tasks.tasks.append(new_task)
-            _write_store(tasks)
-
-            tasks_data = {"tasks": [t.model_dump() for t in tasks.tasks]}
-            meta = _meta_with_widget(tasks_data)
-
-            return types.ServerResult(
-                types.CallToolResult(
-                    content=[
-                        types.TextContent(
-                            type="text",
-                            text=f"✓ Added task: {new_task.text}",
-                        )
-                    ],
-                    structuredContent=tasks_data,
-                    _meta=meta,
-                )
-            )
-
-        elif tool_name == "mark_done":
-            task_id = args.get("task_id")
-            done = args.get("done", True)
-
-            tasks = _read_store()
-            updated = False
+# Tool handlers return (message, is_error); the common response tail lives in
+# _error_result/_success_result so each handler only does its own mutation.
+async def _do_get_tasks(args: Dict[str, Any]) -> tuple[str, bool]:
+    return "Here are your tasks!", False
+
+async def _do_add_task(args: Dict[str, Any]) -> tuple[str, bool]:
+    text = args.get("text", "").strip()
+    if not text:
+        return "Error: Task text cannot be empty", True
+
+    new_task = Task(
+        id=os.urandom(16).hex(),
+        text=text,
+        done=False,
+        created_at=datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+        due_date=args.get("due_date"),
+    )
+    with _store_lock:
+        _STORE.tasks.append(new_task)
+        _INDEX[new_task.id] = new_task
+    _schedule_flush()
+
+    return f"✓ Added task: {new_task.text}", False
+
+async def _do_mark_done(args: Dict[str, Any]) -> tuple[str, bool]:
+    task_id = args.get("task_id")
+    # Coerce client input before it lands on the model: assignment bypasses
+    # validation and reload uses model_construct, so a non-bool would persist.
+    done = bool(args.get("done", True))
+
+    with _store_lock:
+        task = _INDEX.get(task_id)
+        if task is not None:
+            task.done = done
+    if task is None:
+        return f"Error: Task with ID {task_id} not found", True
+    _schedule_flush()
+
+    return f"✓ Task {'completed' if done else 'reopened'}!", False
+
+_TOOL_HANDLERS = {
+    "get_tasks": _do_get_tasks,
+    "add_task": _do_add_task,
+    "mark_done": _do_mark_done,
+}
 
-            for task in tasks.tasks:
-                if task.id == task_id:
-                    task.done = done
-                    updated = True
-                    break
+def _error_result(text: str) -> types.ServerResult:
+    return types.ServerResult(
+        types.CallToolResult(
+            content=[types.TextContent(type="text", text=text)],
+            isError=True,
+        )
+    )
 
-            if not updated:
-                return types.ServerResult(
-                    types.CallToolResult(
-                        content=[types.TextContent(type="text", text=f"Error: Task with ID {task_id} not found")],
-                        isError=True,
-                    )
-                )
-
-            _write_store(tasks)
-
-            tasks_data = {"tasks": [t.model_dump() for t in tasks.tasks]}
-            meta = _meta_with_widget(tasks_data)
-
-            return types.ServerResult(
-                types.CallToolResult(
-                    content=[
-                        types.TextContent(
-                            type="text",
-                            text=f"✓ Task {'completed' if done else 'reopened'}!",
-                        )
-                    ],
-                    structuredContent=tasks_data,
-                    _meta=meta,
-                )
-            )
+def _success_result(text: str) -> types.ServerResult:
+    with _store_lock:
+        tasks_data = _STORE.model_dump(mode="json", exclude_none=True)
+    return types.ServerResult(
+        types.CallToolResult(
+            content=[types.TextContent(type="text", text=text)],
+            structuredContent=tasks_data,
+            _meta=_WIDGET_META,
+        )
+    )
 
-        else:
-            return types.ServerResult(
-                types.CallToolResult(
-                    content=[types.TextContent(type="text", text=f"Unknown tool: {tool_name}")],
-                    isError=True,
-                )
-            )
+async def _handle_call_tool(req: types.CallToolRequest) -> types.ServerResult:
+    handler = _TOOL_HANDLERS.get(req.params.name)
+    if handler is None:
+        return _error_result(f"Unknown tool: {req.params.name}")
 
+    try:
+        message, is_error = await handler(req.params.arguments or {})
     except Exception as e:
-        return types.ServerResult(
-            types.CallToolResult(
-                content=[types.TextContent(type="text", text=f"Error: {str(e)}")],
-                isError=True,
-            )
-        )
+        return _error_result(f"Error: {str(e)}")
+
+    if is_error:
+        return _error_result(message)
+    return _success_result(message)
 
 mcp._mcp_server.request_handlers[types.CallToolRequest] = _handle_call_tool
 
@@ -401,6 +462,9 @@ async def main():
             )
         )
 
+        # Widget payloads are repetitive JSON/HTML and compress well
+        starlette_app.add_middleware(GZipMiddleware, minimum_size=512)
+
         # Serve via uvicorn, mirroring FastMCP.run_sse_async
         config = uvicorn.Config(
             starlette_app,
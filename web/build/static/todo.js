@@ -1,8 +1,9 @@
 /**
  * Renders the todo widget UI inside ChatGPT (or the preview page).
- * The widget expects to receive the latest task list via a JSON blob embedded
- * in the MCP response. Interactions post messages back to the parent frame so
- * ChatGPT can invoke the appropriate tools.
+ * The widget reads the latest task list from the host via
+ * window.openai.toolOutput, falling back to an embedded #todo-data JSON blob
+ * (used by the static preview page). Interactions post messages back to the
+ * parent frame so ChatGPT can invoke the appropriate tools.
  */
 (() => {
 
@@ -283,13 +284,32 @@
     root.append(card);
   }
 
-  const dataEl = document.getElementById("todo-data");
+  function readTasksData() {
+    if (window.openai && window.openai.toolOutput) {
+      return window.openai.toolOutput;
+    }
+
+    const dataEl = document.getElementById("todo-data");
+    if (dataEl && dataEl.textContent.trim()) {
+      return JSON.parse(dataEl.textContent);
+    }
+
+    return { tasks: [] };
+  }
+
   const root = document.getElementById("todo-root");
-  const data = JSON.parse(dataEl.textContent);
 
-  renderTodoWidget({
-    root,
-    tasks: data.tasks,
-    postMessageTarget: window.parent,
-  });
+  function rerender() {
+    const data = readTasksData();
+    renderTodoWidget({
+      root,
+      tasks: data.tasks || [],
+      postMessageTarget: window.parent,
+    });
+  }
+
+  rerender();
+
+  // The host refreshes window.openai.toolOutput after each tool call.
+  window.addEventListener("openai:set_globals", rerender);
 })();